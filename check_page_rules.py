@@ -0,0 +1,403 @@
+#!/usr/bin/env python3
+"""
+声明式页面规则校验
+所有规则在 PAGE_RULES 中声明一次（必需元素、脚本标记、meta 与 JSON-LD 字段、
+canonical URL 是否与文件名一致等）。全部规则的正则被编译进同一个多分支正则，
+由 re 在 C 中完成扫描；每个页面只按块流式扫描一遍，增加规则不会增加扫描次数。
+Usage: python check_page_rules.py [--json] [file ...]
+"""
+
+import json
+import re
+import sys
+from fnmatch import fnmatch
+from functools import lru_cache
+from pathlib import Path
+
+SITE_BASE_URL = "https://jasonma6602.github.io/usv-blog/"
+# 流式读取的块大小
+CHUNK_SIZE = 64 * 1024
+# 单个标签（属性部分）和 JSON-LD 内容的最大长度，规则正则必须以此为界
+MAX_TAG_LENGTH = 2048
+MAX_JSON_LD_LENGTH = 64 * 1024
+# 任意规则单次匹配的最大长度；块之间保留这么长的重叠，跨块的匹配不会丢失
+MAX_MATCH_LENGTH = MAX_JSON_LD_LENGTH + 2 * MAX_TAG_LENGTH + 64
+
+# 标签属性，例如 content="..."、content='...' 或 content=...；属性名前必须是空白或上一个属性值的引号
+ATTRIBUTE_PATTERN = re.compile(r'''(?<=[\s"'])([\w:-]+)\s*=\s*(?:"([^"]*)"|'([^']*)'|([^\s"'>]+))''')
+# 规则正则中属性名的起始位置，避免 data-name= 之类的属性被当作 name=
+ATTRIBUTE_START = r'(?<=[\s"\'])'
+
+
+class Rule:
+    """
+    单条页面规则。
+    - marker：页面中必须出现的字面字符串
+    - pattern + anchors：页面中必须匹配的正则，只在 anchors 中任一字面前缀出现的位置尝试；
+      anchors 为 (文本, 是否忽略大小写) 元组；正则长度须受 MAX_MATCH_LENGTH 限制，
+      有分组时取第 1 组作为值
+    - collect：收集所有匹配而不只是第一个，值为匹配文本的列表（例如页面中的多个 JSON-LD 块）
+    - within：不单独匹配，取另一条规则的值进行校验（例如 JSON-LD 中的字段）
+    check(value, page_name) 返回错误信息，通过时返回 None；value 为首次匹配的文本（collect 规则为列表）。
+    """
+
+    def __init__(self, rule_id, description, marker=None, pattern=None, anchors=(), within=None,
+                 collect=False, severity='error', pages='*.html', check=None):
+        self.rule_id = rule_id
+        self.description = description
+        self.within = within
+        self.collect = collect
+        self.severity = severity
+        self.pages = pages
+        self.check = check
+        if marker is not None:
+            pattern = re.escape(marker)
+            anchors = ((marker, False),)
+        self.anchors = tuple(anchors)
+        self.regex = re.compile(pattern) if pattern is not None else None
+
+    def applies_to(self, page_name):
+        return fnmatch(page_name, self.pages)
+
+    def value(self, match):
+        return match.group(1) if self.regex.groups else match.group(0)
+
+
+def tag_anchors(tag):
+    """标签的字面前缀，与 tag_pattern 一样不区分大小写"""
+    return ((f'<{tag}', True),)
+
+
+def anchor_pattern(anchor):
+    """
+    锚点对应的正则片段。忽略大小写的锚点展开为字符类（<[mM][eE]...），
+    re.IGNORECASE 会让整个多分支正则慢一个数量级，字符类则与字面匹配一样快。
+    """
+    text, ignore_case = anchor
+    if not ignore_case:
+        return re.escape(text)
+    return ''.join(f'[{ch.lower()}{ch.upper()}]' if ch.isalpha() else re.escape(ch) for ch in text)
+
+
+def anchor_at(buffer, start, anchor):
+    """锚点是否出现在 buffer 的 start 位置"""
+    text, ignore_case = anchor
+    if not ignore_case:
+        return buffer.startswith(text, start)
+    return buffer[start:start + len(text)].lower() == text.lower()
+
+
+def tag_pattern(tag, attribute, value):
+    """匹配 attribute=value 的 tag 标签，不限属性顺序、引号和空白"""
+    return (
+        rf'(?i:<{tag}(?=[\s/>])(?=[^>]{{0,{MAX_TAG_LENGTH}}}?{ATTRIBUTE_START}{attribute}\s*=\s*["\']?{re.escape(value)}["\'\s/>])'
+        rf'[^>]{{0,{MAX_TAG_LENGTH}}}>)'
+    )
+
+
+def tag_attributes(tag):
+    """解析标签文本中的属性，返回 {属性名: 值}"""
+    attributes = {}
+    for match in ATTRIBUTE_PATTERN.finditer(tag):
+        value = next(group for group in match.groups()[1:] if group is not None)
+        attributes.setdefault(match.group(1).lower(), value)
+    return attributes
+
+
+def attribute(name, check):
+    """对标签中 name 属性的值运行 check"""
+    def check_attribute(tag, page_name):
+        attributes = tag_attributes(tag)
+        if name not in attributes:
+            return f"缺少 {name} 属性"
+        return check(attributes[name], page_name)
+    return check_attribute
+
+
+def not_empty(value, page_name):
+    """属性值不能为空"""
+    return None if value.strip() else "值为空"
+
+
+def matches_page_url(value, page_name):
+    """URL 必须指向当前页面"""
+    expected = SITE_BASE_URL + page_name
+    return None if value == expected else f"应为 {expected}，实际为 {value}"
+
+
+# 文章页 JSON-LD 中描述文章本身的类型
+ARTICLE_TYPES = {'Article', 'BlogPosting', 'NewsArticle'}
+
+
+def valid_json(blocks, page_name):
+    """每个 JSON-LD 块都必须是合法的 JSON 对象或对象数组"""
+    for index, block in enumerate(blocks, start=1):
+        try:
+            data = json.loads(block)
+        except ValueError as e:
+            return f"第 {index} 个 JSON-LD 块解析失败: {str(e)}"
+        items = data if isinstance(data, list) else [data]
+        if not items or not all(isinstance(item, dict) for item in items):
+            return f"第 {index} 个 JSON-LD 块不是 JSON 对象"
+    return None
+
+
+def json_ld_objects(blocks):
+    """展开所有 JSON-LD 块中的顶层对象，包括数组和 @graph 中的对象；无法解析的块跳过"""
+    objects = []
+    for block in blocks:
+        try:
+            data = json.loads(block)
+        except ValueError:
+            continue
+        pending = data if isinstance(data, list) else [data]
+        while pending:
+            item = pending.pop(0)
+            if isinstance(item, dict):
+                objects.append(item)
+                if isinstance(item.get('@graph'), list):
+                    pending.extend(item['@graph'])
+    return objects
+
+
+def is_article(item):
+    types = item.get('@type')
+    types = types if isinstance(types, list) else [types]
+    return any(t in ARTICLE_TYPES for t in types if isinstance(t, str))
+
+
+def json_field(field):
+    """
+    文章 JSON-LD 对象中 field 字段必须存在且不为空。
+    页面有多个块（例如 BreadcrumbList 在前）时检查 @type 为文章类型的对象；
+    没有文章类型的对象时，任一对象带有该字段即可。
+    """
+    def check_field(blocks, page_name):
+        objects = json_ld_objects(blocks)
+        if not objects:
+            return "JSON-LD 无法解析"
+        articles = [item for item in objects if is_article(item)] or objects
+        if not any(str(item.get(field) or '').strip() for item in articles):
+            return f"JSON-LD 缺少 {field} 字段"
+        return None
+    return check_field
+
+
+JSON_LD_PATTERN = (
+    rf'(?is:<script(?=[\s/>])(?=[^>]{{0,{MAX_TAG_LENGTH}}}?{ATTRIBUTE_START}type\s*=\s*["\']?application/ld\+json)'
+    rf'[^>]{{0,{MAX_TAG_LENGTH}}}>(.{{0,{MAX_JSON_LD_LENGTH}}}?)</script\s*>)'
+)
+
+PAGE_RULES = [
+    # 返回首页功能
+    Rule('return-home-button', '返回首页按钮', marker='return-home', pages='blog-post-*.html'),
+    Rule('return-home-script', '返回首页JavaScript', marker='Return to Homepage functionality',
+         pages='blog-post-*.html'),
+    Rule('home-link', '首页链接', marker='href="index.html"', pages='blog-post-*.html'),
+    # Back to Top 功能
+    Rule('back-to-top-button', 'Back to Top按钮', marker='backToTop'),
+    Rule('back-to-top-script', 'Back to Top脚本', marker='Back to Top functionality'),
+    Rule('scroll-listener', '滚动事件监听', marker="window.addEventListener('scroll'"),
+    # meta 字段
+    Rule('meta-description', 'meta description', pattern=tag_pattern('meta', 'name', 'description'),
+         anchors=tag_anchors('meta'),
+         check=attribute('content', not_empty)),
+    Rule('og-url', 'Open Graph URL', pattern=tag_pattern('meta', 'property', 'og:url'),
+         anchors=tag_anchors('meta'),
+         severity='warning', check=attribute('content', matches_page_url)),
+    Rule('canonical-url', 'canonical URL', pattern=tag_pattern('link', 'rel', 'canonical'),
+         anchors=tag_anchors('link'),
+         severity='warning', check=attribute('href', matches_page_url)),
+    # JSON-LD 结构化数据
+    Rule('json-ld', 'JSON-LD 结构化数据', pattern=JSON_LD_PATTERN,
+         anchors=tag_anchors('script'), collect=True, severity='warning',
+         check=valid_json),
+    Rule('json-ld-headline', 'JSON-LD headline', within='json-ld', severity='warning',
+         pages='blog-post-*.html', check=json_field('headline')),
+    Rule('json-ld-date-published', 'JSON-LD datePublished', within='json-ld',
+         severity='warning', pages='blog-post-*.html', check=json_field('datePublished')),
+]
+
+
+@lru_cache(maxsize=None)
+def compile_anchors(anchors):
+    """把锚点集合编译为多分支正则，长锚点在前；没有锚点时返回 None"""
+    if not anchors:
+        return None
+    ordered = sorted(anchors, key=lambda anchor: (-len(anchor[0]), anchor))
+    return re.compile('|'.join(map(anchor_pattern, ordered)))
+
+
+class RuleScanner:
+    """
+    按块接收页面文本，一遍扫描记录每条规则的首次匹配。
+    所有规则的锚点编译为一个多分支正则，由 re 在 C 中扫描；只在锚点出现的位置
+    运行对应规则的正则。块之间保留 MAX_MATCH_LENGTH 的重叠，只在重叠之前的位置确认匹配，
+    跨块的匹配不会丢失；每次从上一个锚点的下一个字符继续搜索，重叠的锚点也不会漏掉。
+    """
+
+    def __init__(self, rules):
+        self.rules = [rule for rule in rules if rule.regex is not None]
+        self.values = {}
+        self._buffer = ''
+        self._compile_anchors()
+
+    def _compile_anchors(self):
+        """只保留还有未命中规则或收集所有匹配的规则的锚点"""
+        self.anchors = compile_anchors(frozenset(
+            anchor for rule in self.rules if rule.collect or rule.rule_id not in self.values
+            for anchor in rule.anchors
+        ))
+
+    def feed(self, chunk, final=False):
+        buffer = self._buffer + chunk
+        limit = len(buffer) if final else len(buffer) - MAX_MATCH_LENGTH
+        position = 0
+        while position < limit and self.anchors is not None:
+            match = self.anchors.search(buffer, position)
+            if match is None or match.start() >= limit:
+                break
+            if self._match_rules(buffer, match.start()):
+                self._compile_anchors()
+            position = match.start() + 1
+        self._buffer = buffer[max(limit, 0):]
+
+    def _match_rules(self, buffer, start):
+        """
+        在锚点位置尝试锚点出现在此处的未命中规则和收集规则，有规则新命中时返回 True。
+        多分支正则只报告同一位置上最长的锚点，因此逐条检查规则自己的锚点。
+        """
+        matched = False
+        for rule in self.rules:
+            if rule.rule_id in self.values and not rule.collect:
+                continue
+            if not any(anchor_at(buffer, start, anchor) for anchor in rule.anchors):
+                continue
+            match = rule.regex.match(buffer, start)
+            if not match:
+                continue
+            if rule.collect:
+                self.values.setdefault(rule.rule_id, []).append(rule.value(match))
+            else:
+                self.values[rule.rule_id] = rule.value(match)
+                matched = True
+        return matched
+
+    def close(self):
+        self.feed('', final=True)
+
+
+def select_rules(rule_ids=None):
+    """按 rule_id 选择规则，默认返回全部规则"""
+    if rule_ids is None:
+        return PAGE_RULES
+    rules_by_id = {rule.rule_id: rule for rule in PAGE_RULES}
+    return [rules_by_id[rule_id] for rule_id in rule_ids]
+
+
+def check_page(file_path, rule_ids=None):
+    """
+    对单个页面运行规则，返回可 JSON 序列化的页面报告。
+    指定 rule_ids 时只运行这些规则，且不再按 pages 过滤。
+    """
+    file_path = Path(file_path)
+    rules = select_rules(rule_ids)
+    if rule_ids is None:
+        rules = [rule for rule in rules if rule.applies_to(file_path.name)]
+
+    report = {'page': file_path.name, 'passed': True, 'results': []}
+    try:
+        scanner = RuleScanner(rules)
+        with open(file_path, 'r', encoding='utf-8') as f:
+            for chunk in iter(lambda: f.read(CHUNK_SIZE), ''):
+                scanner.feed(chunk)
+        scanner.close()
+    except Exception as e:
+        report['passed'] = False
+        report['error'] = f"验证失败: {str(e)}"
+        return report
+
+    for rule in rules:
+        value = scanner.values.get(rule.within or rule.rule_id)
+        if value is None:
+            message = f"缺少{rule.description}"
+        elif rule.check:
+            message = rule.check(value, file_path.name)
+        else:
+            message = None
+
+        passed = message is None
+        if not passed and rule.severity == 'error':
+            report['passed'] = False
+        report['results'].append({
+            'rule': rule.rule_id,
+            'description': rule.description,
+            'severity': rule.severity,
+            'passed': passed,
+            'message': message,
+        })
+
+    return report
+
+
+def validate_page(file_path, rule_ids):
+    """
+    兼容各修复脚本原有的验证接口：返回 (是否通过, 说明)。
+    """
+    report = check_page(file_path, rule_ids)
+    if 'error' in report:
+        return False, report['error']
+
+    missing = [result['description'] for result in report['results'] if not result['passed']]
+    if missing:
+        return False, f"缺少: {', '.join(missing)}"
+    return True, None
+
+
+def main():
+    """主函数：校验所有页面并输出报告"""
+    args = sys.argv[1:]
+    as_json = '--json' in args
+    files = [Path(arg) for arg in args if arg != '--json']
+
+    if not files:
+        current_dir = Path(".")
+        files = [current_dir / "index.html"] + sorted(current_dir.glob("blog-post-*.html"))
+        files = [file_path for file_path in files if file_path.exists()]
+
+    if not files:
+        print("❌ 未找到需要校验的页面")
+        sys.exit(1)
+
+    reports = [check_page(file_path) for file_path in files]
+    failed_pages = [report['page'] for report in reports if not report['passed']]
+
+    if as_json:
+        print(json.dumps({
+            'rules': len(PAGE_RULES),
+            'pages': reports,
+            'failed_pages': failed_pages,
+        }, ensure_ascii=False, indent=2))
+    else:
+        print("📋 开始校验页面规则...")
+        print("=" * 60)
+        print(f"📁 {len(files)} 个页面，{len(PAGE_RULES)} 条规则，每个页面扫描一次")
+        for report in reports:
+            icon = "✅" if report['passed'] else "❌"
+            print(f"\n{icon} {report['page']}")
+            if 'error' in report:
+                print(f"   - {report['error']}")
+            for result in report['results']:
+                if not result['passed']:
+                    level = "❌" if result['severity'] == 'error' else "⚠️ "
+                    print(f"   {level} {result['rule']}: {result['message']}")
+
+        print("\n" + "=" * 60)
+        print(f"📊 通过: {len(reports) - len(failed_pages)} 个页面，失败: {len(failed_pages)} 个页面")
+
+    if failed_pages:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,278 @@
+#!/usr/bin/env python3
+"""
+发布前离线检查站点内部链接和锚点
+脚本会解析所有 *.html 页面，检查页面之间的链接、#锚点、articlesData 中的文章链接
+以及 sitemap.xml 中的 URL，发现错误时以非零状态码退出。
+
+每个页面只解析一次（多进程并行），解析结果按内容哈希缓存到 .link_check_cache.json，
+再次运行时只重新解析内容发生变化的页面。
+Usage: python check_site_links.py [--no-cache]
+"""
+
+import hashlib
+import json
+import os
+import re
+import sys
+import xml.etree.ElementTree as ET
+from concurrent.futures import ProcessPoolExecutor
+from html.parser import HTMLParser
+from pathlib import Path
+from urllib.parse import unquote, urlsplit
+
+SITE_BASE_URL = "https://jasonma6602.github.io/usv-blog/"
+CACHE_FILE = ".link_check_cache.json"
+# 解析逻辑变化时修改版本号，使旧缓存失效
+CACHE_VERSION = 1
+
+# 带链接的标签属性
+LINK_ATTRIBUTES = {
+    'a': 'href',
+    'link': 'href',
+    'img': 'src',
+    'script': 'src',
+    'source': 'src',
+    'iframe': 'src',
+}
+
+# index.html 中 articlesData 数组里的文章链接，例如 link: "blog-post-12.html"
+ARTICLE_LINK_PATTERN = re.compile(r'\blink\s*:\s*["\']([^"\']+)["\']')
+
+
+class LinkTableParser(HTMLParser):
+    """收集单个页面的链接表和 id 表"""
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.ids = set()
+        self.links = []
+        self.article_links = []
+        self._in_script = False
+
+    def handle_starttag(self, tag, attrs):
+        attrs = dict(attrs)
+        for name in ('id', 'name') if tag == 'a' else ('id',):
+            if attrs.get(name):
+                self.ids.add(attrs[name])
+
+        attr = LINK_ATTRIBUTES.get(tag)
+        if attr and attrs.get(attr) is not None:
+            self.links.append((attrs[attr], self.getpos()[0]))
+
+        if tag == 'script' and 'src' not in attrs:
+            self._in_script = True
+
+    def handle_endtag(self, tag):
+        if tag == 'script':
+            self._in_script = False
+
+    def handle_data(self, data):
+        if not self._in_script:
+            return
+        line_offset = self.getpos()[0]
+        for match in ARTICLE_LINK_PATTERN.finditer(data):
+            line = line_offset + data.count('\n', 0, match.start())
+            self.article_links.append((match.group(1), line))
+
+
+def parse_page(file_path):
+    """解析单个页面，返回可缓存的链接表和 id 表（在子进程中运行）"""
+    with open(file_path, 'r', encoding='utf-8') as f:
+        content = f.read()
+
+    parser = LinkTableParser()
+    parser.feed(content)
+    parser.close()
+
+    return {
+        'ids': sorted(parser.ids),
+        'links': parser.links,
+        'article_links': parser.article_links,
+    }
+
+
+def file_digest(file_path):
+    """计算文件内容的 SHA-256 哈希"""
+    with open(file_path, 'rb') as f:
+        return hashlib.sha256(f.read()).hexdigest()
+
+
+def load_cache(cache_path):
+    """读取解析缓存，版本不匹配或文件损坏时返回空缓存"""
+    try:
+        with open(cache_path, 'r', encoding='utf-8') as f:
+            cache = json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+    if cache.get('version') != CACHE_VERSION:
+        return {}
+    return cache.get('pages', {})
+
+
+def save_cache(cache_path, pages):
+    """写入解析缓存"""
+    try:
+        with open(cache_path, 'w', encoding='utf-8') as f:
+            json.dump({'version': CACHE_VERSION, 'pages': pages}, f, ensure_ascii=False)
+    except OSError as e:
+        print(f"⚠️  无法写入缓存 {cache_path}: {str(e)}")
+
+
+def build_link_tables(site_dir, html_files, use_cache=True):
+    """解析所有页面，返回 {文件名: 解析结果} 以及重新解析的页面数量"""
+    cache_path = site_dir / CACHE_FILE
+    cached_pages = load_cache(cache_path) if use_cache else {}
+
+    tables = {}
+    digests = {}
+    stale_files = []
+    for file_path in html_files:
+        digest = file_digest(file_path)
+        digests[file_path.name] = digest
+        entry = cached_pages.get(file_path.name)
+        if entry and entry.get('sha256') == digest:
+            tables[file_path.name] = entry['table']
+        else:
+            stale_files.append(file_path)
+
+    if len(stale_files) > 1:
+        with ProcessPoolExecutor() as executor:
+            results = executor.map(parse_page, stale_files)
+            for file_path, table in zip(stale_files, results):
+                tables[file_path.name] = table
+    else:
+        for file_path in stale_files:
+            tables[file_path.name] = parse_page(file_path)
+
+    if use_cache:
+        save_cache(cache_path, {
+            name: {'sha256': digests[name], 'table': table}
+            for name, table in tables.items()
+        })
+
+    return tables, len(stale_files)
+
+
+def resolve_target(url, source_name):
+    """
+    把链接解析为 (站内文件路径, 锚点)。
+    站外链接、mailto:、javascript: 等返回 None。
+    """
+    if url.startswith(SITE_BASE_URL):
+        url = url[len(SITE_BASE_URL):] or 'index.html'
+
+    parts = urlsplit(url)
+    if parts.scheme or parts.netloc:
+        return None
+
+    path = unquote(parts.path)
+    if not path:
+        # 纯锚点链接，例如 "#articles"
+        path = source_name
+    elif path.startswith('/'):
+        path = path.lstrip('/')
+    else:
+        path = os.path.normpath(os.path.join(os.path.dirname(source_name), path))
+
+    if path.endswith('/') or path in ('', '.'):
+        path = os.path.join(path, 'index.html')
+
+    return Path(path).as_posix(), unquote(parts.fragment)
+
+
+def check_target(site_dir, tables, source_name, url, line, label):
+    """检查单个链接目标，返回错误信息；没有问题时返回 None"""
+    resolved = resolve_target(url, source_name)
+    if resolved is None:
+        return None
+
+    target, fragment = resolved
+    if target.startswith('..'):
+        return f"{source_name}:{line}: {label} {url} 指向站点目录之外"
+    if not (site_dir / target).is_file():
+        return f"{source_name}:{line}: {label} {url} 目标文件不存在"
+
+    # "#" 和 "#top" 由浏览器定位到页面顶部，不需要对应的 id
+    if fragment and fragment != 'top' and target in tables:
+        if fragment not in tables[target]['ids']:
+            return f"{source_name}:{line}: {label} {url} 锚点 #{fragment} 在 {target} 中不存在"
+
+    return None
+
+
+def check_link_graph(site_dir, tables):
+    """检查所有页面的链接和 articlesData 条目"""
+    errors = []
+    for source_name in sorted(tables):
+        table = tables[source_name]
+        for url, line in table['links']:
+            error = check_target(site_dir, tables, source_name, url, line, "链接")
+            if error:
+                errors.append(error)
+        for url, line in table['article_links']:
+            error = check_target(site_dir, tables, source_name, url, line, "articlesData 文章链接")
+            if error:
+                errors.append(error)
+    return errors
+
+
+def check_sitemap(site_dir, tables):
+    """检查 sitemap.xml 中的每个 URL 都有对应的文件（错误位置为第几个 <loc>）"""
+    sitemap_path = site_dir / "sitemap.xml"
+    if not sitemap_path.exists():
+        return ["sitemap.xml 不存在"]
+
+    try:
+        tree = ET.parse(sitemap_path)
+    except ET.ParseError as e:
+        return [f"sitemap.xml 解析失败: {str(e)}"]
+
+    errors = []
+    namespace = '{http://www.sitemaps.org/schemas/sitemap/0.9}'
+    for index, loc in enumerate(tree.iter(f'{namespace}loc'), start=1):
+        url = (loc.text or '').strip()
+        if not url.startswith(SITE_BASE_URL):
+            errors.append(f"sitemap.xml: {url} 不属于站点 {SITE_BASE_URL}")
+            continue
+        error = check_target(site_dir, tables, "sitemap.xml", url, index, "URL")
+        if error:
+            errors.append(error)
+    return errors
+
+
+def main():
+    """主函数：检查整个站点的链接图"""
+    print("🔗 开始检查站点内部链接和锚点...")
+    print("=" * 60)
+
+    use_cache = '--no-cache' not in sys.argv[1:]
+    site_dir = Path(".")
+    html_files = sorted(site_dir.glob("*.html"))
+
+    if not html_files:
+        print("❌ 未找到 HTML 文件")
+        sys.exit(1)
+
+    tables, parsed_count = build_link_tables(site_dir, html_files, use_cache)
+    print(f"📁 找到 {len(html_files)} 个页面，重新解析 {parsed_count} 个，"
+          f"使用缓存 {len(html_files) - parsed_count} 个")
+
+    errors = check_link_graph(site_dir, tables)
+    errors.extend(check_sitemap(site_dir, tables))
+
+    link_count = sum(len(t['links']) + len(t['article_links']) for t in tables.values())
+    print(f"🔍 检查了 {link_count} 个链接")
+
+    print("\n" + "=" * 60)
+    if errors:
+        print(f"❌ 发现 {len(errors)} 个错误:")
+        for error in errors:
+            print(f"   - {error}")
+        sys.exit(1)
+
+    print("✅ 所有内部链接和锚点检查通过")
+
+
+if __name__ == "__main__":
+    main()
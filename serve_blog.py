@@ -0,0 +1,503 @@
+#!/usr/bin/env python3
+"""
+本地预览服务器
+基于 asyncio 从内存缓存中提供博客目录下的文件，行为尽量接近线上环境：
+- 文件内容缓存在内存中，通过轮询文件变化使缓存失效
+- 强 ETag，支持 If-None-Match / 304
+- 协商 gzip 和 brotli 压缩，存在 .gz / .br 预压缩文件时优先使用
+- 文件修改后通过 SSE 推送 live reload 事件
+- 支持大量并发的 keep-alive 连接，可作为本地压测目标
+
+brotli 动态压缩需要安装可选依赖 brotli；未安装时只使用 .br 预压缩文件。
+Usage: python serve_blog.py [--host 127.0.0.1] [--port 8000] [--no-reload]
+"""
+
+import argparse
+import asyncio
+import functools
+import gzip
+import hashlib
+import mimetypes
+import os
+import sys
+from email.utils import formatdate
+from pathlib import Path
+from urllib.parse import unquote, urlsplit
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+LIVE_RELOAD_PATH = "/__livereload"
+LIVE_RELOAD_SCRIPT = b"""<script>
+    // Live reload (injected by serve_blog.py)
+    new EventSource('""" + LIVE_RELOAD_PATH.encode() + b"""').addEventListener('reload', () => location.reload());
+</script>
+"""
+# 文件变化轮询间隔（秒）
+WATCH_INTERVAL = 0.5
+# SSE 心跳间隔（秒），防止空闲连接被中间代理断开
+SSE_HEARTBEAT_INTERVAL = 15
+# 小于该大小的文件不做动态压缩
+MIN_COMPRESS_SIZE = 256
+MAX_HEADER_SIZE = 64 * 1024
+# 丢弃请求体时每次读取的字节数
+DISCARD_CHUNK_SIZE = 64 * 1024
+
+COMPRESSIBLE_TYPES = (
+    'text/',
+    'application/javascript',
+    'application/json',
+    'application/xml',
+    'image/svg+xml',
+)
+PRECOMPRESSED_SUFFIXES = {'br': '.br', 'gzip': '.gz'}
+# 直接请求压缩文件（例如 style.css.gz）时按压缩格式本身返回，不能当作原始类型
+ENCODED_FILE_TYPES = {
+    'gzip': 'application/gzip',
+    'br': 'application/x-brotli',
+    'bzip2': 'application/x-bzip2',
+    'xz': 'application/x-xz',
+    'compress': 'application/x-compress',
+}
+
+HTTP_REASONS = {
+    200: 'OK',
+    304: 'Not Modified',
+    400: 'Bad Request',
+    403: 'Forbidden',
+    404: 'Not Found',
+    405: 'Method Not Allowed',
+}
+
+
+def make_etag(data):
+    """根据内容生成强 ETag"""
+    return '"' + hashlib.sha256(data).hexdigest()[:32] + '"'
+
+
+def parse_accept_encoding(header):
+    """解析 Accept-Encoding，返回客户端接受的编码集合（q=0 视为不接受）"""
+    accepted = set()
+    for item in header.split(','):
+        parts = item.strip().split(';')
+        encoding = parts[0].strip().lower()
+        if not encoding:
+            continue
+        quality = 1.0
+        for param in parts[1:]:
+            name, _, value = param.strip().partition('=')
+            if name == 'q':
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        if quality > 0:
+            accepted.add(encoding)
+    return accepted
+
+
+def compress(body, encoding):
+    """压缩内容并生成 ETag，返回 (内容, ETag)；不支持的编码返回 None（在线程池中运行）"""
+    if encoding == 'gzip':
+        data = gzip.compress(body, compresslevel=6, mtime=0)
+    elif encoding == 'br' and brotli is not None:
+        data = brotli.compress(body)
+    else:
+        return None
+    return data, make_etag(data)
+
+
+def etag_matches(if_none_match, etag):
+    """If-None-Match 使用弱比较（RFC 9110 13.1.2），忽略 W/ 前缀"""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == '*':
+        return True
+    for tag in if_none_match.split(','):
+        tag = tag.strip()
+        if tag.startswith('W/'):
+            tag = tag[2:]
+        if tag == etag:
+            return True
+    return False
+
+
+class CachedFile:
+    """内存中缓存的单个文件及其各个压缩版本"""
+
+    def __init__(self, path, body, precompressed):
+        content_type, file_encoding = mimetypes.guess_type(str(path))
+        if file_encoding:
+            content_type = ENCODED_FILE_TYPES.get(file_encoding)
+        content_type = content_type or 'application/octet-stream'
+        if content_type.startswith('text/') or content_type in ('application/javascript', 'application/json'):
+            content_type += '; charset=utf-8'
+
+        self.content_type = content_type
+        self.compressible = content_type.startswith(COMPRESSIBLE_TYPES) and len(body) >= MIN_COMPRESS_SIZE
+        # {编码: (内容, ETag)}
+        self.variants = {'identity': (body, make_etag(body))}
+        for encoding, data in precompressed.items():
+            self.variants[encoding] = (data, make_etag(data))
+        # {编码: 正在线程池中进行的压缩}
+        self._pending = {}
+
+    async def variant(self, accepted_encodings):
+        """按 br > gzip > identity 的顺序选择客户端可接受的版本"""
+        for encoding in ('br', 'gzip'):
+            if encoding not in accepted_encodings:
+                continue
+            if encoding not in self.variants and self.compressible:
+                await self._compress(encoding)
+            if encoding in self.variants:
+                return (encoding,) + self.variants[encoding]
+        return ('identity',) + self.variants['identity']
+
+    async def _compress(self, encoding):
+        """在线程池中压缩，同一编码的并发请求共享同一次压缩"""
+        if encoding == 'br' and brotli is None:
+            return
+        future = self._pending.get(encoding)
+        if future is None:
+            body = self.variants['identity'][0]
+            future = asyncio.get_running_loop().run_in_executor(None, compress, body, encoding)
+            self._pending[encoding] = future
+            future.add_done_callback(functools.partial(self._compressed, encoding))
+        # shield：单个请求被取消时不取消其他请求共享的压缩
+        await asyncio.shield(future)
+
+    def _compressed(self, encoding, future):
+        del self._pending[encoding]
+        if not future.cancelled() and future.exception() is None and future.result() is not None:
+            self.variants[encoding] = future.result()
+
+
+class BlogServer:
+    """预览服务器：内存缓存、文件监控和 live reload"""
+
+    def __init__(self, root, live_reload=True):
+        self.root = Path(root).resolve()
+        self.live_reload = live_reload
+        self.cache = {}
+        # {文件路径: 正在线程池中进行的读取}
+        self._pending = {}
+        self.reload_clients = set()
+        # {连接处理任务: StreamWriter}，关闭服务器时用于结束所有连接
+        self.connections = {}
+        self._snapshot = {}
+
+    # ---------- 缓存 ----------
+
+    def resolve_path(self, url_path):
+        """把请求路径映射到站点目录内的文件，越界或隐藏文件返回 None"""
+        path = unquote(url_path)
+        if path.endswith('/'):
+            path += 'index.html'
+        parts = [part for part in path.split('/') if part]
+        if any(part.startswith('.') for part in parts):
+            return None
+        file_path = self.root.joinpath(*parts)
+        if os.path.isdir(file_path):
+            file_path = file_path / 'index.html'
+        return file_path
+
+    async def load(self, file_path):
+        """
+        从缓存中取文件，未命中时在线程池中读取磁盘并放入缓存。
+        同一文件的并发未命中共享同一次读取。
+        """
+        entry = self.cache.get(file_path)
+        if entry is not None:
+            return entry
+
+        future = self._pending.get(file_path)
+        if future is None:
+            future = asyncio.get_running_loop().run_in_executor(None, self.read_file, file_path)
+            self._pending[file_path] = future
+            future.add_done_callback(functools.partial(self._loaded, file_path))
+        # shield：单个请求被取消时不取消其他请求共享的读取
+        return await asyncio.shield(future)
+
+    def _loaded(self, file_path, future):
+        # 读取期间文件发生变化时 watch 已移除该 future，结果可能已过期，不放入缓存
+        if self._pending.get(file_path) is not future:
+            return
+        del self._pending[file_path]
+        if not future.cancelled() and future.exception() is None and future.result() is not None:
+            self.cache[file_path] = future.result()
+
+    def read_file(self, file_path):
+        """读取文件及其预压缩版本，文件不存在时返回 None（在线程池中运行）"""
+        if not file_path.is_file():
+            return None
+
+        body = file_path.read_bytes()
+        precompressed = {}
+        if self.live_reload and file_path.suffix == '.html':
+            # 注入 live reload 脚本后内容与预压缩文件不再一致，只使用动态压缩
+            body = self.inject_live_reload(body)
+        else:
+            for encoding, suffix in PRECOMPRESSED_SUFFIXES.items():
+                sibling = file_path.with_name(file_path.name + suffix)
+                if sibling.is_file():
+                    precompressed[encoding] = sibling.read_bytes()
+
+        return CachedFile(file_path, body, precompressed)
+
+    @staticmethod
+    def inject_live_reload(body):
+        index = body.rfind(b'</body>')
+        if index == -1:
+            return body + LIVE_RELOAD_SCRIPT
+        return body[:index] + LIVE_RELOAD_SCRIPT + body[index:]
+
+    # ---------- 文件监控 ----------
+
+    def scan(self):
+        """记录站点目录下所有文件的 (mtime, size)"""
+        snapshot = {}
+        for dirpath, dirnames, filenames in os.walk(self.root):
+            dirnames[:] = [name for name in dirnames if not name.startswith('.')]
+            for filename in filenames:
+                path = Path(dirpath) / filename
+                try:
+                    stat = path.stat()
+                except OSError:
+                    continue
+                snapshot[path] = (stat.st_mtime_ns, stat.st_size)
+        return snapshot
+
+    async def watch(self):
+        """轮询文件变化，使对应缓存失效并通知 live reload 客户端"""
+        loop = asyncio.get_running_loop()
+        self._snapshot = await loop.run_in_executor(None, self.scan)
+        while True:
+            await asyncio.sleep(WATCH_INTERVAL)
+            snapshot = await loop.run_in_executor(None, self.scan)
+            changed = {
+                path for path in self._snapshot.keys() | snapshot.keys()
+                if self._snapshot.get(path) != snapshot.get(path)
+            }
+            self._snapshot = snapshot
+            if not changed:
+                continue
+
+            for path in changed:
+                self.cache.pop(path, None)
+                self._pending.pop(path, None)
+                # 预压缩文件变化时，源文件的缓存同样失效
+                if path.suffix in ('.gz', '.br'):
+                    self.cache.pop(path.with_suffix(''), None)
+                    self._pending.pop(path.with_suffix(''), None)
+
+            names = ', '.join(sorted(str(path.relative_to(self.root)) for path in changed))
+            print(f"🔄 文件变化: {names}")
+            for queue in self.reload_clients:
+                queue.put_nowait(names)
+
+    # ---------- HTTP ----------
+
+    async def handle_connection(self, reader, writer):
+        self.connections[asyncio.current_task()] = writer
+        try:
+            while True:
+                try:
+                    header_data = await reader.readuntil(b'\r\n\r\n')
+                except asyncio.IncompleteReadError:
+                    break
+                except asyncio.LimitOverrunError:
+                    await self.send(writer, 400, {}, b'')
+                    break
+
+                request = self.parse_request(header_data)
+                if request is None:
+                    await self.send(writer, 400, {}, b'')
+                    break
+
+                method, target, headers, keep_alive = request
+                path = urlsplit(target).path
+
+                # 请求体不会被使用，但必须从连接中读掉，否则会被当作下一个请求解析
+                if 'transfer-encoding' in headers:
+                    keep_alive = False
+                elif 'content-length' in headers:
+                    try:
+                        await self.discard_body(reader, int(headers['content-length']))
+                    except ValueError:
+                        await self.send(writer, 400, {'Connection': 'close'}, b'')
+                        break
+
+                if self.live_reload and path == LIVE_RELOAD_PATH and method == 'GET':
+                    await self.stream_reload_events(writer)
+                    break
+
+                await self.handle_request(writer, method, path, headers, keep_alive)
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError):
+            # 客户端断开连接（包括请求体未发送完就断开）
+            pass
+        finally:
+            # 任务被取消时关闭连接后继续抛出 CancelledError
+            writer.close()
+            self.connections.pop(asyncio.current_task(), None)
+
+    @staticmethod
+    def parse_request(header_data):
+        """解析请求行和请求头，返回 (方法, 目标, 请求头, 是否 keep-alive)"""
+        try:
+            lines = header_data.decode('latin-1').split('\r\n')
+            method, target, version = lines[0].split(' ')
+        except ValueError:
+            return None
+
+        headers = {}
+        for line in lines[1:]:
+            name, sep, value = line.partition(':')
+            if sep:
+                headers[name.strip().lower()] = value.strip()
+
+        connection = headers.get('connection', '').lower()
+        if version == 'HTTP/1.1':
+            keep_alive = connection != 'close'
+        else:
+            keep_alive = connection == 'keep-alive'
+        return method, target, headers, keep_alive
+
+    @staticmethod
+    async def discard_body(reader, length):
+        """按块读掉长度为 length 的请求体"""
+        if length < 0:
+            raise ValueError(f"invalid Content-Length: {length}")
+        while length > 0:
+            chunk = await reader.readexactly(min(length, DISCARD_CHUNK_SIZE))
+            length -= len(chunk)
+
+    async def handle_request(self, writer, method, path, headers, keep_alive):
+        connection = {'Connection': 'keep-alive' if keep_alive else 'close'}
+        if method not in ('GET', 'HEAD'):
+            await self.send(writer, 405, dict(connection, Allow='GET, HEAD'), b'')
+            return
+
+        file_path = self.resolve_path(path)
+        if file_path is None:
+            await self.send(writer, 403, connection, b'')
+            return
+
+        entry = await self.load(file_path)
+        if entry is None:
+            await self.send(writer, 404, dict(connection, **{'Content-Type': 'text/plain; charset=utf-8'}),
+                            b'404 Not Found', head_only=(method == 'HEAD'))
+            return
+
+        encoding, body, etag = await entry.variant(parse_accept_encoding(headers.get('accept-encoding', '')))
+        response_headers = dict(connection, **{
+            'ETag': etag,
+            'Cache-Control': 'no-cache',
+            'Vary': 'Accept-Encoding',
+        })
+
+        if etag_matches(headers.get('if-none-match'), etag):
+            await self.send(writer, 304, response_headers, b'')
+            return
+
+        response_headers['Content-Type'] = entry.content_type
+        if encoding != 'identity':
+            response_headers['Content-Encoding'] = encoding
+        await self.send(writer, 200, response_headers, body, head_only=(method == 'HEAD'))
+
+    @staticmethod
+    async def send(writer, status, headers, body, head_only=False):
+        lines = [f"HTTP/1.1 {status} {HTTP_REASONS[status]}", f"Date: {formatdate(usegmt=True)}"]
+        if status != 304:
+            lines.append(f"Content-Length: {len(body)}")
+        lines.extend(f"{name}: {value}" for name, value in headers.items())
+        writer.write(('\r\n'.join(lines) + '\r\n\r\n').encode('latin-1'))
+        if body and not head_only:
+            writer.write(body)
+        await writer.drain()
+
+    async def stream_reload_events(self, writer):
+        """SSE 长连接：文件变化时推送 reload 事件"""
+        writer.write(
+            b"HTTP/1.1 200 OK\r\n"
+            b"Content-Type: text/event-stream\r\n"
+            b"Cache-Control: no-cache\r\n"
+            b"Connection: keep-alive\r\n\r\n"
+            b"retry: 1000\n\n"
+        )
+        await writer.drain()
+
+        queue = asyncio.Queue()
+        self.reload_clients.add(queue)
+        try:
+            while True:
+                try:
+                    names = await asyncio.wait_for(queue.get(), SSE_HEARTBEAT_INTERVAL)
+                except asyncio.TimeoutError:
+                    writer.write(b": heartbeat\n\n")
+                else:
+                    if names is None:
+                        return
+                    writer.write(f"event: reload\ndata: {names}\n\n".encode('utf-8'))
+                await writer.drain()
+        finally:
+            self.reload_clients.discard(queue)
+
+
+    async def close(self, timeout=1.0):
+        """
+        关闭所有连接并等待处理任务正常结束：空闲连接的读取在连接关闭后结束，
+        live reload 流收到 None 后结束。超时仍未结束的任务由事件循环取消。
+        """
+        for queue in self.reload_clients:
+            queue.put_nowait(None)
+        for writer in self.connections.values():
+            writer.close()
+        if self.connections:
+            await asyncio.wait(list(self.connections), timeout=timeout)
+
+
+async def serve(root, host, port, live_reload):
+    blog_server = BlogServer(root, live_reload)
+    server = await asyncio.start_server(blog_server.handle_connection, host, port,
+                                        limit=MAX_HEADER_SIZE, backlog=1024)
+    watcher = asyncio.create_task(blog_server.watch())
+
+    print(f"🚀 预览服务器已启动: http://{host}:{port}/")
+    print(f"📁 站点目录: {blog_server.root}")
+    print(f"🔁 Live reload: {'开启' if live_reload else '关闭'}")
+    if brotli is None:
+        print("ℹ️  未安装 brotli，仅使用 .br 预压缩文件")
+    print("按 Ctrl+C 停止")
+
+    try:
+        async with server:
+            await server.serve_forever()
+    finally:
+        watcher.cancel()
+        await blog_server.close()
+
+
+def main():
+    """主函数：启动本地预览服务器"""
+    parser = argparse.ArgumentParser(description="USV Blog 本地预览服务器")
+    parser.add_argument('--host', default='127.0.0.1', help="监听地址 (默认 127.0.0.1)")
+    parser.add_argument('--port', type=int, default=8000, help="监听端口 (默认 8000)")
+    parser.add_argument('--root', default='.', help="站点目录 (默认当前目录)")
+    parser.add_argument('--no-reload', action='store_true', help="关闭 live reload")
+    args = parser.parse_args()
+
+    try:
+        asyncio.run(serve(args.root, args.host, args.port, not args.no_reload))
+    except KeyboardInterrupt:
+        print("\n👋 预览服务器已停止")
+    except OSError as e:
+        print(f"❌ 启动失败: {str(e)}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
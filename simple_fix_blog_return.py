@@ -6,39 +6,47 @@
 import shutil
 from pathlib import Path
 
+from check_page_rules import validate_page
+from splice_writer import apply_edits, find_all, mapped
+
+# 验证时运行的规则，定义见 check_page_rules.PAGE_RULES
+VALIDATION_RULES = [
+    'return-home-button',
+    'return-home-script',
+    'home-link',
+    'back-to-top-button',
+    'back-to-top-script',
+]
+
 def fix_file_simple(file_path):
     """简单修复方法：使用字符串替换"""
     try:
-        with open(file_path, 'r', encoding='utf-8') as f:
-            content = f.read()
-        
-        # 检查是否已经存在返回首页功能
-        if 'return-home' in content and 'Return to Homepage functionality' in content:
-            print(f"⏭️  {file_path.name} 已存在完整功能，跳过")
-            return True, "已存在"
-        
-        # 备份原始文件
-        backup_path = file_path.with_suffix('.html.backup3')
-        if not backup_path.exists():
-            shutil.copy2(file_path, backup_path)
-        
-        # 1. 添加返回首页按钮
-        if '<!-- Return to Homepage Button -->' not in content:
-            back_to_top_button = '<button id="backToTop" class="back-to-top" aria-label="Back to top">'
-            return_home_button = '''    <!-- Return to Homepage Button -->
+        with mapped(file_path) as content:
+            # 检查是否已经存在返回首页功能
+            has_return_script = content.find(b'Return to Homepage functionality') != -1
+            if content.find(b'return-home') != -1 and has_return_script:
+                print(f"⏭️  {file_path.name} 已存在完整功能，跳过")
+                return True, "已存在"
+
+            edits = []
+
+            # 1. 添加返回首页按钮
+            if content.find(b'<!-- Return to Homepage Button -->') == -1:
+                back_to_top_button = b'<button id="backToTop" class="back-to-top" aria-label="Back to top">'
+                return_home_button = '''    <!-- Return to Homepage Button -->
     <a href="index.html" class="return-home" aria-label="Return to homepage">
         <i class="fas fa-home"></i>
     </a>
 
-    <button id="backToTop" class="back-to-top" aria-label="Back to top">'''
-            
-            content = content.replace(back_to_top_button, return_home_button)
-        
-        # 2. 添加JavaScript功能
-        if 'Return to Homepage functionality' not in content:
-            # 找到JavaScript部分，在backToTop功能之前添加
-            js_insert_point = '// Back to Top functionality'
-            new_js = '''        // Return to Homepage functionality
+    '''.encode('utf-8')
+
+                edits += [(offset, 0, return_home_button) for offset in find_all(content, back_to_top_button)]
+
+            # 2. 添加JavaScript功能
+            if not has_return_script:
+                # 找到JavaScript部分，在backToTop功能之前添加
+                js_insert_point = b'// Back to Top functionality'
+                new_js = '''        // Return to Homepage functionality
         const returnHomeButton = document.querySelector('.return-home');
         if (returnHomeButton) {
             // Show/hide return home button based on scroll position
@@ -51,13 +59,17 @@ def fix_file_simple(file_path):
             });
         }
 
-        // Back to Top functionality'''
-            
-            content = content.replace(js_insert_point, new_js)
-        
-        # 写入更新后的内容
-        with open(file_path, 'w', encoding='utf-8') as f:
-            f.write(content)
+        '''.encode('utf-8')
+
+                edits += [(offset, 0, new_js) for offset in find_all(content, js_insert_point)]
+
+        # 备份原始文件
+        backup_path = file_path.with_suffix('.html.backup3')
+        if not backup_path.exists():
+            shutil.copy2(file_path, backup_path)
+
+        # 流式写入修复后的内容，只拼接插入的部分
+        apply_edits(file_path, edits)
         
         print(f"✅ {file_path.name} 修复成功")
         return True, "修复成功"
@@ -68,33 +80,8 @@ def fix_file_simple(file_path):
 
 def validate_fix(file_path):
     """验证修复是否成功"""
-    try:
-        with open(file_path, 'r', encoding='utf-8') as f:
-            content = f.read()
-        
-        # 检查是否包含返回首页按钮
-        has_return_button = 'return-home' in content
-        has_return_script = 'Return to Homepage functionality' in content
-        has_home_link = 'href="index.html"' in content
-        
-        # 检查原有的back to top功能是否完整
-        has_back_to_top_button = 'backToTop' in content
-        has_back_to_top_script = 'Back to Top functionality' in content
-        
-        issues = []
-        if not has_return_button: issues.append("返回首页按钮")
-        if not has_return_script: issues.append("返回首页JavaScript")
-        if not has_home_link: issues.append("首页链接")
-        if not has_back_to_top_button: issues.append("Back to Top按钮")
-        if not has_back_to_top_script: issues.append("Back to Top脚本")
-        
-        if not issues:
-            return True, "所有功能完整"
-        else:
-            return False, f"缺少: {', '.join(issues)}"
-            
-    except Exception as e:
-        return False, f"验证失败: {str(e)}"
+    is_valid, message = validate_page(file_path, VALIDATION_RULES)
+    return is_valid, message or "所有功能完整"
 
 def main():
     """主函数：修复所有博客文件"""
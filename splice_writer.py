@@ -0,0 +1,154 @@
+#!/usr/bin/env python3
+"""
+流式拼接写入
+修复脚本不再把整个页面读入内存并反复 replace，而是先在 mmap 上定位修改位置，
+得到 (偏移, 删除长度, 插入字节) 编辑列表，再流式写出新文件：
+未修改的区间用 os.copy_file_range / os.sendfile 在内核中直接复制（不可用时退回到
+固定大小的 mmap 切片），只写入插入的字节。峰值内存与页面大小无关。
+"""
+
+import errno
+import mmap
+import os
+import shutil
+import sys
+import tempfile
+from contextlib import contextmanager
+
+# 退回到 mmap 切片复制时每次写入的最大字节数
+COPY_CHUNK_SIZE = 1024 * 1024
+
+# 当前系统 / 文件系统不支持的复制方式，失败一次后不再尝试。
+# EINVAL 也可能是参数错误，只有在还没有复制任何字节时才视为不支持；EBADF 等其他错误直接抛出
+_UNSUPPORTED_ERRNOS = {errno.EXDEV, errno.ENOSYS, errno.EOPNOTSUPP, errno.ENOTSOCK}
+_unsupported_methods = set()
+
+
+@contextmanager
+def mapped(file_path):
+    """只读 mmap 打开文件，用于 find / re.finditer 定位，空文件返回 b''"""
+    with open(file_path, 'rb') as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            yield b''
+            return
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            yield mm
+
+
+def find_all(data, marker):
+    """返回 marker 在 data 中每次出现的偏移（不重叠）"""
+    offsets = []
+    start = data.find(marker)
+    while start != -1:
+        offsets.append(start)
+        start = data.find(marker, start + len(marker))
+    return offsets
+
+
+def normalize_edits(edits, size):
+    """按偏移排序（同一偏移保持原有顺序）并检查编辑范围不重叠、不越界"""
+    edits = sorted(edits, key=lambda edit: edit[0])
+    position = 0
+    for offset, delete_length, _ in edits:
+        if offset < position or delete_length < 0 or offset + delete_length > size:
+            raise ValueError(f"编辑范围重叠或越界: offset={offset}, delete={delete_length}")
+        position = offset + delete_length
+    return edits
+
+
+def _copy_file_range(src_fd, dst_fd, offset, count):
+    while count > 0:
+        copied = os.copy_file_range(src_fd, dst_fd, count, offset)
+        if copied == 0:
+            raise EOFError("源文件在复制过程中被截断")
+        offset += copied
+        count -= copied
+
+
+def _sendfile(src_fd, dst_fd, offset, count):
+    while count > 0:
+        copied = os.sendfile(dst_fd, src_fd, offset, count)
+        if copied == 0:
+            raise EOFError("源文件在复制过程中被截断")
+        offset += copied
+        count -= copied
+
+
+def _write_all(dst, data):
+    """无缓冲文件的 write 可能只写入一部分，循环直到全部写完"""
+    with memoryview(data) as view:
+        while view:
+            written = dst.write(view)
+            view = view[written:]
+
+
+def _mmap_copy(src, dst, offset, count):
+    with mmap.mmap(src.fileno(), 0, access=mmap.ACCESS_READ) as mm, memoryview(mm) as view:
+        end = offset + count
+        while offset < end:
+            chunk_end = min(offset + COPY_CHUNK_SIZE, end)
+            _write_all(dst, view[offset:chunk_end])
+            offset = chunk_end
+
+
+# 只有 Linux 的 sendfile 支持写入普通文件（macOS / FreeBSD 只能写 socket），与 shutil 的做法一致
+_KERNEL_COPY_METHODS = [('copy_file_range', _copy_file_range)]
+if sys.platform.startswith('linux'):
+    _KERNEL_COPY_METHODS.append(('sendfile', _sendfile))
+
+
+def copy_range(src, dst, offset, count):
+    """把 src 中 [offset, offset + count) 追加写入 dst（dst 必须是无缓冲文件）"""
+    if count <= 0:
+        return
+
+    for name, method in _KERNEL_COPY_METHODS:
+        if name in _unsupported_methods or not hasattr(os, name):
+            continue
+        start = dst.tell()
+        try:
+            method(src.fileno(), dst.fileno(), offset, count)
+            return
+        except OSError as e:
+            unsupported = e.errno in _UNSUPPORTED_ERRNOS or (e.errno == errno.EINVAL and dst.tell() == start)
+            if not unsupported:
+                raise
+            _unsupported_methods.add(name)
+            # 部分复制后失败时回到起点，由下一种方式重新复制整个区间
+            dst.seek(start)
+            dst.truncate()
+
+    _mmap_copy(src, dst, offset, count)
+
+
+def apply_edits(file_path, edits):
+    """
+    把编辑列表应用到文件：edits 为 [(偏移, 删除长度, 插入字节), ...]，偏移基于原文件。
+    新内容先写入同目录下的临时文件，再原子替换原文件。没有编辑时返回 False。
+    """
+    file_path = os.fspath(file_path)
+    size = os.path.getsize(file_path)
+    edits = normalize_edits(edits, size)
+    if not edits:
+        return False
+
+    directory, name = os.path.split(os.path.abspath(file_path))
+    fd, temp_path = tempfile.mkstemp(dir=directory, prefix=f'.{name}.', suffix='.tmp')
+    try:
+        with open(file_path, 'rb') as src, open(fd, 'wb', buffering=0) as dst:
+            position = 0
+            for offset, delete_length, insert in edits:
+                copy_range(src, dst, position, offset - position)
+                if insert:
+                    _write_all(dst, insert)
+                position = offset + delete_length
+            copy_range(src, dst, position, size - position)
+
+        shutil.copymode(file_path, temp_path)
+        os.replace(temp_path, file_path)
+    except BaseException:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        raise
+
+    return True
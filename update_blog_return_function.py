@@ -9,35 +9,40 @@ import re
 import shutil
 from pathlib import Path
 
+from check_page_rules import validate_page
+from splice_writer import apply_edits, mapped
+
+# 验证时运行的规则，定义见 check_page_rules.PAGE_RULES
+VALIDATION_RULES = [
+    'return-home-button',
+    'return-home-script',
+    'home-link',
+]
+
 def add_return_home_functionality(file_path):
     """为单个博客文件添加返回首页功能"""
     try:
-        with open(file_path, 'r', encoding='utf-8') as f:
-            content = f.read()
-        
-        # 检查是否已经存在返回首页功能
-        if 'return-home' in content:
-            print(f"⏭️  {file_path.name} 已存在返回首页功能，跳过")
-            return True, "已存在"
-        
-        # 备份原始文件
-        backup_path = file_path.with_suffix('.html.backup')
-        shutil.copy2(file_path, backup_path)
-        
-        # 添加返回首页按钮（在Back to Top按钮之前）
-        back_to_top_pattern = r'(<button id="backToTop" class="back-to-top" aria-label="Back to top">)'
-        return_home_button = '''    <!-- Return to Homepage Button -->
+        with mapped(file_path) as content:
+            # 检查是否已经存在返回首页功能
+            if content.find(b'return-home') != -1:
+                print(f"⏭️  {file_path.name} 已存在返回首页功能，跳过")
+                return True, "已存在"
+
+            # 添加返回首页按钮（在Back to Top按钮之前）
+            back_to_top_pattern = rb'<button id="backToTop" class="back-to-top" aria-label="Back to top">'
+            return_home_button = '''    <!-- Return to Homepage Button -->
     <a href="index.html" class="return-home" aria-label="Return to homepage">
         <i class="fas fa-home"></i>
     </a>
 
-'''
-        
-        content = re.sub(back_to_top_pattern, return_home_button + r'\1', content)
-        
-        # 更新JavaScript功能
-        old_script_pattern = r'(function toggleMenu\(\) \{[^}]*\}[^}]*\})'
-        new_script = r'''\1
+'''.encode('utf-8')
+
+            edits = [(match.start(), 0, return_home_button)
+                     for match in re.finditer(back_to_top_pattern, content)]
+
+            # 更新JavaScript功能（追加在 toggleMenu 函数之后）
+            old_script_pattern = rb'function toggleMenu\(\) \{[^}]*\}[^}]*\}'
+            new_script = '''
 
         // Return to Homepage functionality
         const returnHomeButton = document.querySelector('.return-home');
@@ -49,13 +54,17 @@ def add_return_home_functionality(file_path):
             } else {
                 returnHomeButton.classList.remove('show');
             }
-        });'''
-        
-        content = re.sub(old_script_pattern, new_script, content, flags=re.DOTALL)
-        
-        # 写入更新后的内容
-        with open(file_path, 'w', encoding='utf-8') as f:
-            f.write(content)
+        });'''.encode('utf-8')
+
+            edits += [(match.end(), 0, new_script)
+                      for match in re.finditer(old_script_pattern, content, flags=re.DOTALL)]
+
+        # 备份原始文件
+        backup_path = file_path.with_suffix('.html.backup')
+        shutil.copy2(file_path, backup_path)
+
+        # 流式写入更新后的内容，只拼接插入的部分
+        apply_edits(file_path, edits)
         
         print(f"✅ {file_path.name} 更新成功")
         return True, "更新成功"
@@ -66,26 +75,8 @@ def add_return_home_functionality(file_path):
 
 def validate_update(file_path):
     """验证文件更新是否成功"""
-    try:
-        with open(file_path, 'r', encoding='utf-8') as f:
-            content = f.read()
-        
-        # 检查是否包含返回首页按钮
-        has_return_button = 'return-home' in content
-        has_return_script = 'Return to Homepage functionality' in content
-        has_home_link = 'href="index.html"' in content
-        
-        if has_return_button and has_return_script and has_home_link:
-            return True, "验证通过"
-        else:
-            missing = []
-            if not has_return_button: missing.append("返回首页按钮")
-            if not has_return_script: missing.append("JavaScript功能")
-            if not has_home_link: missing.append("首页链接")
-            return False, f"缺少: {', '.join(missing)}"
-            
-    except Exception as e:
-        return False, f"验证失败: {str(e)}"
+    is_valid, message = validate_page(file_path, VALIDATION_RULES)
+    return is_valid, message or "验证通过"
 
 def main():
     """主函数：批量处理所有博客文件"""